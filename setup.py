@@ -14,7 +14,7 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/PTB-PSt1/time-series-buffer",
-    packages=setuptools.find_packages(),
+    packages=["time_series_buffer"],
     keywords="buffer time-series uncertainty metrology",
     install_requires=[
         "numpy",
@@ -1,3 +1,5 @@
+from array import array
+
 import numpy as np
 import pytest
 import uncertainties
@@ -32,6 +34,152 @@ def test_add_array():
         assert tsb.buffer[-1][0] == data[-1, 0]
 
 
+def test_add_beyond_maxlen():
+    tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="array")
+
+    # add more data than fits into the buffer, in chunks not aligned to maxlen
+    data = np.random.random((3 * maxlen + 3, 4))
+    for chunk in np.array_split(data, 7):
+        tsb.add(data=chunk)
+
+    # only the latest maxlen elements are kept, oldest first
+    assert len(tsb) == maxlen
+    assert np.all(tsb.show(n_samples=-1) == data[-maxlen:])
+    assert np.all(tsb.pop(n_samples=maxlen) == data[-maxlen:])
+
+    # a single chunk larger than the buffer keeps its latest elements
+    tsb.add(data=data)
+    assert np.all(tsb.show(n_samples=-1) == data[-maxlen:])
+
+
+def test_add_block():
+    tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="array")
+
+    M = 4
+    data = np.random.random((N, M))
+    tsb.add_block(data)
+
+    assert len(tsb) == N
+    assert np.all(tsb.show(n_samples=-1) == data)
+
+    with pytest.raises(ValueError):
+        tsb.add_block(data[:, :3])
+
+    with pytest.raises(ValueError):
+        tsb.add_block(data.astype(np.float32))
+
+
+def test_add_from_double_buffer():
+    tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="array")
+
+    M = 3
+    data = np.random.random((N, M))
+    buf = array("d", data.ravel())
+
+    tsb.add_from_double_buffer(buf, ncols=M)
+
+    assert len(tsb) == N
+    assert tsb.buffer[-1] == (data[-1, 0], tsb.empty_unc, data[-1, 1], data[-1, 2])
+
+    with pytest.raises(ValueError):
+        tsb.add_from_double_buffer(buf, ncols=5)
+
+    # single precision floats are rejected instead of reinterpreted
+    with pytest.raises(ValueError):
+        tsb.add_from_double_buffer(array("f", data.ravel()), ncols=M)
+    assert len(tsb) == N
+
+
+def test_add_single_datapoints():
+    tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="array")
+
+    # stream more datapoints than fit into the buffer one by one
+    data = np.random.random((maxlen + N, 4))
+    for t, ut, v, uv in data:
+        tsb.add(time=float(t), time_unc=ut, val=v, val_unc=uv)
+
+    assert len(tsb) == maxlen
+    assert np.all(tsb.show(n_samples=-1) == data[-maxlen:])
+
+    # integer uncertainties are stored as floats
+    tsb.add(time=1.0, time_unc=0, val=2.0, val_unc=1)
+    assert tsb.buffer[-1] == (1.0, 0.0, 2.0, 1.0)
+
+    # unsupported data is ignored for a single datapoint, as before
+    tsb.add(data=5, time=3.0, val=4.0)
+    assert tsb.buffer[-1] == (3.0, 0.0, 4.0, 0.0)
+    assert len(tsb) == maxlen
+
+
+def test_add_single_ufloat_value():
+    tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="array")
+
+    # single datapoint with ufloat value
+    tsb.add(time=1.0, time_unc=0.1, val=uncertainties.ufloat(2.0, 0.2))
+    assert tsb.buffer[-1] == (1.0, 0.1, 2.0, 0.2)
+
+    # time series with a single ufloat value for all timestamps
+    t = np.random.random(N)
+    tsb.add(time=t, val=uncertainties.ufloat(3.0, 0.3))
+    assert len(tsb) == N + 1
+    expected = np.column_stack((t, np.zeros(N), np.full(N, 3.0), np.full(N, 0.3)))
+    assert np.all(tsb.show(n_samples=N) == expected)
+
+
+def test_add_derived_ufloats():
+    # results of calculations with ufloats are accepted like ufloats
+    u = uncertainties.ufloat(1.0, 0.1) * 2
+    expected = (u.nominal_value, u.std_dev, u.nominal_value, u.std_dev)
+    t = np.random.random(3)
+
+    tsb = TimeSeriesBuffer(maxlen=maxlen)
+    tsb.add(time=1.0, val=u)
+    assert tsb.buffer[-1] == (1.0, 0.0) + expected[2:]
+
+    tsb.add(time=t, val=u)
+    assert tsb.buffer[-1] == (t[-1], 0.0) + expected[2:]
+
+    tsb.add(time=t, val=[u] * 3)
+    assert tsb.buffer[-1] == (t[-1], 0.0) + expected[2:]
+
+    tsb.add(time=[u] * 3, val=t)
+    assert tsb.buffer[-1] == expected[:2] + (t[-1], 0.0)
+
+    tsb.add(data=[(u, u)])
+    assert tsb.buffer[-1] == expected
+
+    udata = np.empty((1, 2), dtype=object)
+    udata[0] = (u, u)
+    tsb.add(data=udata)
+    assert tsb.buffer[-1] == expected
+
+    assert len(tsb) == 1 + 3 * 3 + 2
+
+
+def test_add_list_of_datapoints():
+    tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="array")
+    ignore = tsb.empty_unc
+
+    # equally long datapoints are added in bulk
+    for M in [2, 3, 4]:
+        data = np.random.random((N, M))
+        tsb.add(data=[tuple(row) for row in data.tolist()])
+        assert tsb.buffer[-1][0] == data[-1, 0]
+    assert np.all(tsb.show(n_samples=N) == data)
+
+    # datapoints of different length or with ufloats are added one by one
+    u = uncertainties.ufloat(2.0, 0.2)
+    tsb.add(data=[(1.0, 2.0), [3.0, 4.0, 0.4], (5.0, 0.5, 6.0, 0.6), (u, 7.0), ()])
+    assert tsb.buffer[-5:-1] == [
+        (1.0, ignore, 2.0, ignore),
+        (3.0, ignore, 4.0, 0.4),
+        (5.0, 0.5, 6.0, 0.6),
+        (2.0, 0.2, 7.0, ignore),
+    ]
+    assert np.isnan(tsb.buffer[-1][0])
+    assert len(tsb) == 3 * N + 5
+
+
 def test_add_uarray():
     tsb = TimeSeriesBuffer(maxlen=maxlen)
 
@@ -146,6 +294,21 @@ def test_pop_size_and_order():
     assert np.all(result == data[0:n_samples, :])
 
 
+def test_pop_non_positive_n_samples():
+    M = 4
+    tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="array")
+    data = np.random.random((N, M))
+    tsb.add(data=data)
+
+    # nothing is returned and the buffer is left untouched
+    for n in [0, -1, -3]:
+        result = tsb.pop(n_samples=n)
+        assert result.shape == (0, 4)
+        assert len(tsb) == N
+
+    assert np.all(tsb.show(n_samples=-1) == data)
+
+
 def test_show_size_and_order():
     n_samples = 7
 
@@ -166,6 +329,59 @@ def test_show_size_and_order():
     assert np.all(result == data[-n_samples:, :])
 
 
+def test_pop_and_show_single_sample():
+    def as_array(result, return_type):
+        # bring any return format to a float-array of shape (N, 4)
+        if return_type == "list":
+            return np.array(result)
+        elif return_type == "array":
+            return result
+        elif return_type == "arrays":
+            return np.column_stack(result)
+        elif return_type == "uarray":
+            result = result[:, 0], result[:, 1]
+        t, v = result
+        return np.column_stack(
+            (
+                unumpy.nominal_values(t),
+                unumpy.std_devs(t),
+                unumpy.nominal_values(v),
+                unumpy.std_devs(v),
+            )
+        )
+
+    M = 4
+    data = np.random.random((N, M))
+
+    for return_type in ["list", "array", "arrays", "uarray", "uarrays"]:
+        tsb = TimeSeriesBuffer(maxlen=maxlen, return_type=return_type)
+        tsb.add(data=data)
+
+        # a single sample is returned in the same format as multiple samples
+        newest = tsb.show(n_samples=1)
+        oldest = tsb.pop(n_samples=1)
+        assert type(newest) is type(oldest) is type(tsb.show(n_samples=2))
+        assert len(tsb) == N - 1
+
+        assert np.all(as_array(newest, return_type) == data[-1:])
+        assert np.all(as_array(oldest, return_type) == data[:1])
+
+
+def test_show_non_positive_n_samples():
+    M = 4
+    tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="array")
+
+    # wrap the ring buffer around before showing
+    data = np.random.random((maxlen + N, M))
+    tsb.add(data=data)
+
+    # only -1 has a special meaning, other non-positive values show nothing
+    for n in [0, -2, -N]:
+        result = tsb.show(n_samples=n)
+        assert result.shape == (0, 4)
+        assert len(tsb) == maxlen
+
+
 def test_show_all():
 
     M = 4
@@ -250,6 +466,25 @@ def test_return_format_uarrays():
     assert isinstance(v[0], uncertainties.core.Variable)
 
 
+def test_maxlen():
+    tsb = TimeSeriesBuffer(maxlen=maxlen)
+    assert tsb.maxlen == maxlen
+    assert tsb.buffer.maxlen == maxlen
+
+    # maxlen is fixed, the storage is preallocated
+    with pytest.raises(AttributeError):
+        tsb.maxlen = 3
+
+    for invalid_maxlen in [0, -1, None, 2.5]:
+        with pytest.raises(ValueError):
+            TimeSeriesBuffer(maxlen=invalid_maxlen)
+
+
+def test_error_on_unsupported_return_type():
+    with pytest.raises(ValueError):
+        TimeSeriesBuffer(maxlen=maxlen, return_type="dict")
+
+
 def test_pop_empty_array():
     tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="array")
     result = tsb.pop()
@@ -290,3 +525,45 @@ def test_pop_empty_uarrays():
     assert isinstance(v, np.ndarray)
     assert t.size == 0
     assert v.size == 0
+
+
+def test_pop_empty_read_only():
+    # shapes and dtypes of the results of an empty buffer per return type
+    expected = {
+        "array": [((0, 4), np.float64)],
+        "arrays": [((0,), np.float64)] * 4,
+        "uarray": [((0, 2), object)],
+        "uarrays": [((0,), object)] * 2,
+    }
+
+    for return_type, expected_arrays in expected.items():
+        tsb = TimeSeriesBuffer(maxlen=maxlen, return_type=return_type)
+        other = TimeSeriesBuffer(maxlen=maxlen, return_type=return_type)
+
+        for result in [tsb.pop(n_samples=n_samples), tsb.show(n_samples=n_samples)]:
+            arrays = [result] if return_type in ["array", "uarray"] else list(result)
+            assert len(arrays) == len(expected_arrays)
+
+            for arr, (shape, dtype) in zip(arrays, expected_arrays):
+                assert arr.shape == shape
+                assert arr.dtype == dtype
+                assert not arr.flags.writeable
+                with pytest.raises(ValueError):
+                    arr.flags.writeable = True
+
+                # reshaping the result doesn't affect other instances
+                arr.shape = (0, 5)
+
+        other_result = other.pop(n_samples=n_samples)
+        other_arrays = (
+            [other_result] if return_type in ["array", "uarray"] else other_result
+        )
+        for arr, (shape, dtype) in zip(other_arrays, expected_arrays):
+            assert arr.shape == shape
+            assert arr.dtype == dtype
+
+    # list results are never shared
+    tsb = TimeSeriesBuffer(maxlen=maxlen, return_type="list")
+    result = tsb.pop()
+    result.append((0.0, 0.0, 0.0, 0.0))
+    assert tsb.pop() == []
@@ -1,4 +1,5 @@
-from collections import deque
+from collections.abc import Sequence
+from itertools import chain
 
 import numpy as np
 import uncertainties
@@ -6,24 +7,148 @@ from uncertainties import unumpy
 
 __all__ = ["TimeSeriesBuffer"]
 
+# bound once, used to build ufloats
+_UVar = uncertainties.core.Variable
+
+# any ufloat, including results of calculations with ufloats, bound once and
+# checked for every datapoint in add
+_UFloat = uncertainties.core.AffineScalarFunc
+
+# integer tags of the supported return types
+_RT_LIST, _RT_ARRAY, _RT_ARRAYS, _RT_UARRAY, _RT_UARRAYS = range(5)
+_RETURN_TYPES = {
+    "list": _RT_LIST,
+    "array": _RT_ARRAY,
+    "arrays": _RT_ARRAYS,
+    "uarray": _RT_UARRAY,
+    "uarrays": _RT_UARRAYS,
+}
+
+
+def _nom_std(x):
+    """Split an iterable of ufloats into nominal values and standard deviations,
+    walking it only once.
+
+    Returns
+    -------
+        two float-arrays of shape (N,)
+    """
+    if isinstance(x, np.ndarray):
+        x = x.tolist()
+
+    nom = []
+    std = []
+    try:
+        for u in x:
+            nom.append(u.nominal_value)
+            std.append(u.std_dev)
+    except AttributeError:
+        # mix of ufloat and float, let unumpy sort it out
+        return unumpy.nominal_values(x), unumpy.std_devs(x)
+
+    return np.array(nom, dtype=float), np.array(std, dtype=float)
+
+
+def _uarray(nominal, std, out=None):
+    """Build ufloats from two float-arrays in one pass, like :func:`unumpy.uarray`
+    but without the fixed overhead of :class:`numpy.vectorize`.
+
+    Returns
+    -------
+        ufloat-array of shape (N,), `out` if given
+    """
+    if out is None:
+        out = np.empty(len(nominal), dtype=object)
+    out[:] = list(map(_UVar, nominal.tolist(), std.tolist()))
+    return out
+
+
+class _BufferView(Sequence):
+    """
+    Read-only sequence of the datapoints (time, time_unc, val, val_unc) in a
+    :class:`TimeSeriesBuffer`, oldest first. Mimics the deque the buffer was
+    formerly based on, tuples are built lazily on access.
+    """
+
+    __slots__ = ("_tsb",)
+
+    def __init__(self, tsb):
+        self._tsb = tsb
+
+    @property
+    def maxlen(self):
+        return self._tsb.maxlen
+
+    def __len__(self):
+        return len(self._tsb)
+
+    def __getitem__(self, index):
+        n = len(self)
+
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(n))]
+
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("buffer index out of range")
+
+        i = (self._tsb._tail + index) % self.maxlen
+        return tuple(column.item(i) for column in self._tsb._columns)
+
+    def __repr__(self):
+        return "{0}({1}, maxlen={2})".format(
+            type(self).__name__, list(self), self.maxlen
+        )
+
 
 class TimeSeriesBuffer:
     """
     Custom buffer class, that allows to save streams of time-series with uncertainty 
     in timestamps and values. Acts like a FIFO buffer.
+
+    Instances use ``__slots__``, so no further attributes can be assigned to them.
+    Class attributes like :attr:`empty_value` need to be changed on (a subclass of)
+    the class.
     """
 
+    __slots__ = (
+        "_maxlen",
+        "_return_type",
+        "_rt",
+        "_columns",
+        "_views",
+        "_head",
+        "_count",
+    )
+
     empty_value = np.nan
     empty_unc = 0.0  # np.nan?
     supported_iterable_types = (list, tuple, np.ndarray)
 
+    # read-only results of pop and show on an empty buffer, shared by all instances
+    # and only handed out as views, so callers can't reshape or unlock the originals
+    _EMPTY_DATA = np.empty((0, 4))
+    _EMPTY_DATA.flags.writeable = False
+    _EMPTY_COL = np.empty((0,))
+    _EMPTY_COL.flags.writeable = False
+    _EMPTY_UDATA = np.empty((0, 2), dtype=object)
+    _EMPTY_UDATA.flags.writeable = False
+    _EMPTY_UCOL = np.empty((0,), dtype=object)
+    _EMPTY_UCOL.flags.writeable = False
+
+    # columns of the internal storage a (N, M)-shaped data block is written to
+    _data_columns = {2: (0, 2), 3: (0, 2, 3), 4: (0, 1, 2, 3)}
+
     def __init__(self, maxlen=10, return_type="array"):
         """Initialize a FIFO buffer.
         
         Parameters
         ----------
             maxlen: int (default: 10)
-                maximum length of the buffer, directly handed over to deque
+                maximum length of the buffer, the storage is preallocated at init.
+                Needs to be a positive integer, unbounded buffers (``maxlen=None``)
+                are no longer supported.
 
             return_type: str (default: array)
 
@@ -34,14 +159,130 @@ class TimeSeriesBuffer:
                 * uarrays: two ufloat-arrays of shape (N, 1)
         
         """
-        self.buffer = deque(maxlen=maxlen)
+        if not isinstance(maxlen, (int, np.integer)) or maxlen < 1:
+            raise ValueError(
+                "maxlen needs to be an integer of at least 1, got {0}.".format(maxlen)
+            )
+
+        self._maxlen = int(maxlen)
         self.return_type = return_type
 
+        # ring buffer, one contiguous array per column (time, time_unc, val, val_unc)
+        self._columns = tuple(np.empty(maxlen) for _ in range(4))
+        # memoryviews on the columns, cheaper to assign single items through
+        self._views = tuple(memoryview(column) for column in self._columns)
+        self._head = 0  # next row to be written
+        self._count = 0  # number of rows in use
+
+    @property
+    def maxlen(self):
+        """Maximum length of the buffer, fixed at init."""
+        return self._maxlen
+
+    @property
+    def return_type(self):
+        """Format of the data returned by :meth:`pop` and :meth:`show`."""
+        return self._return_type
+
+    @return_type.setter
+    def return_type(self, return_type):
+        if return_type not in _RETURN_TYPES:
+            raise ValueError(
+                "Unsupported return_type '{0}', choose one of {1}.".format(
+                    return_type, list(_RETURN_TYPES)
+                )
+            )
+        self._return_type = return_type
+        self._rt = _RETURN_TYPES[return_type]
+
+    @property
+    def buffer(self):
+        """Read-only view on the buffered datapoints as tuples, oldest first."""
+        return _BufferView(self)
+
+    @property
+    def _tail(self):
+        # oldest row in use
+        return (self._head - self._count) % self._maxlen
+
     def __len__(self):
-        return len(self.buffer)
+        return self._count
 
     def __repr__(self):
-        return "<TimeSeriesBuffer> ({0}/{1})".format(len(self), self.buffer.maxlen)
+        return "<TimeSeriesBuffer> ({0}/{1})".format(len(self), self._maxlen)
+
+    def _ring_slices(self, start, n):
+        """Split `n` consecutive ring positions beginning at `start` into at most
+        two contiguous segments.
+
+        Returns
+        -------
+            list of tuples (storage_slice, chunk_slice)
+        """
+        k1 = min(n, self._maxlen - start)
+        segments = [(slice(start, start + k1), slice(0, k1))]
+        if n > k1:
+            segments.append((slice(0, n - k1), slice(k1, n)))
+        return segments
+
+    def _read_columns(self, start, n):
+        """Copy `n` consecutive rows of the storage beginning at `start`, taking
+        care of the wrap-around.
+
+        Returns
+        -------
+            tuple of four float-arrays of shape (n,)
+        """
+        if n <= 0:
+            return (self._EMPTY_COL,) * 4
+
+        segments = [dst for dst, _ in self._ring_slices(start, n)]
+        if len(segments) == 1:
+            return tuple(column[segments[0]].copy() for column in self._columns)
+        return tuple(
+            np.concatenate([column[dst] for dst in segments])
+            for column in self._columns
+        )
+
+    def _write_columns(self, values, n):
+        """Copy `n` new rows into the storage, column by column.
+
+        Parameters
+        ----------
+            values: sequence of four (float or float-array of shape (n,))
+                New (time, time_unc, val, val_unc), scalars are broadcasted.
+
+            n: int
+                Number of new rows. Oldest rows are overwritten once the buffer is
+                full.
+        """
+        if n == 0:
+            return
+
+        values = [np.asarray(x, dtype=float) for x in values]
+
+        # only the latest maxlen rows survive anyway
+        if n > self._maxlen:
+            values = [x[n - self._maxlen :] if x.ndim else x for x in values]
+            n = self._maxlen
+
+        for dst, src in self._ring_slices(self._head, n):
+            for column, x in zip(self._columns, values):
+                column[dst] = x[src] if x.ndim else x
+
+        self._head = (self._head + n) % self._maxlen
+        self._count = min(self._count + n, self._maxlen)
+
+    def _write_block(self, block, columns=(0, 1, 2, 3)):
+        """Copy a float-array of shape (N, M) into the `columns` of the storage.
+
+        Storage columns not covered by `block` are filled with
+        :attr:`empty_value` or :attr:`empty_unc` respectively.
+        """
+        values = [self.empty_value, self.empty_unc, self.empty_value, self.empty_unc]
+        for k, j in enumerate(columns):
+            values[j] = block[:, k]
+        self._write_columns(values, len(block))
 
     def add(
         self,
@@ -79,98 +320,192 @@ class TimeSeriesBuffer:
         
         """
 
+        # single datapoint, the typical case when streaming
+        if isinstance(time, float) and (
+            data is None or not isinstance(data, self.supported_iterable_types)
+        ):
+            if type(val) is not float and isinstance(val, _UFloat):
+                val, val_unc = val.nominal_value, val.std_dev
+
+            # write the row in place, without any temporary arrays
+            head = self._head
+            col_t, col_ut, col_v, col_uv = self._views
+            col_t[head] = time
+            col_ut[head] = time_unc
+            col_v[head] = val
+            col_uv[head] = val_unc
+
+            head += 1
+            self._head = 0 if head == self._maxlen else head
+            if self._count < self._maxlen:
+                self._count += 1
+            return
+
+        # time series is given as array, inspect dtype and shape only once
+        if isinstance(data, np.ndarray) and data.ndim == 2:
+            kind = data.dtype.kind
+            M = data.shape[1]
+
+            # numeric array, copy in bulk without inspecting any datapoint
+            if kind in "iuf" and M in self._data_columns:
+                self._write_block(data, self._data_columns[M])
+                return
+
+            # array of (ufloat-)pairs, unpack column-wise
+            if kind == "O" and M == 2:
+                t, ut = _nom_std(data[:, 0])
+                v, uv = _nom_std(data[:, 1])
+                self._write_columns((t, ut, v, uv), len(data))
+                return
+
+        # time series is given as list or tuple of equally long float-iterables,
+        # flatten once and copy in bulk
+        if isinstance(data, (list, tuple)) and data:
+            try:
+                # skip right away for ufloat pairs
+                if isinstance(data[0][0], _UFloat):
+                    raise TypeError
+
+                lengths = set(map(len, data))
+                M = lengths.pop() if len(lengths) == 1 else None
+                if M in self._data_columns:
+                    values = chain.from_iterable(data)
+                    block = np.fromiter(values, float, len(data) * M)
+                    self._write_block(block.reshape(-1, M), self._data_columns[M])
+                    return
+            except (IndexError, TypeError, ValueError):
+                # ragged, empty or containing ufloats, handled datapoint by
+                # datapoint below
+                pass
+
         # time series is given as iterable of iterables
         if isinstance(data, self.supported_iterable_types):
+            # flat list of (time, time_unc, val, val_unc) of all datapoints
+            rows = []
+            extend = rows.extend
+            empty_value = self.empty_value
+            empty_unc = self.empty_unc
 
             for datapoint in data:
-                t = self.empty_value
-                ut = self.empty_unc
-                v = self.empty_value
-                uv = self.empty_unc
+                n_values = len(datapoint)
 
                 # datapoint is a pair, could be pair of float or pair of ufloat
-                if len(datapoint) == 2:
-                    if isinstance(datapoint[0], uncertainties.core.Variable):
-                        t = datapoint[0].nominal_value
-                        ut = datapoint[0].std_dev
-                    else:
-                        t = datapoint[0]
-
-                    if isinstance(datapoint[1], uncertainties.core.Variable):
-                        v = datapoint[1].nominal_value
-                        uv = datapoint[1].std_dev
-                    else:
-                        v = datapoint[1]
+                if n_values == 2:
+                    t, v = datapoint
+                    ut = uv = empty_unc
+
+                    if isinstance(t, _UFloat):
+                        t, ut = t.nominal_value, t.std_dev
+
+                    if isinstance(v, _UFloat):
+                        v, uv = v.nominal_value, v.std_dev
+
+                    extend((t, ut, v, uv))
 
                 # datapoint is a triple
-                elif len(datapoint) == 3:  # triple
-                    t = datapoint[0]
-                    v = datapoint[1]
-                    uv = datapoint[2]
+                elif n_values == 3:
+                    t, v, uv = datapoint
+                    extend((t, empty_unc, v, uv))
 
-                elif len(datapoint) == 4:  # 4-tuple
-                    t = datapoint[0]
-                    ut = datapoint[1]
-                    v = datapoint[2]
-                    uv = datapoint[3]
+                # datapoint is a 4-tuple
+                elif n_values == 4:
+                    extend(datapoint)
 
-                self.buffer.append((t, ut, v, uv))
+                else:
+                    extend((empty_value, empty_unc, empty_value, empty_unc))
+
+            if rows:
+                self._write_block(np.array(rows, dtype=float).reshape(-1, 4))
 
         # time series is given as iterable of floats
         elif isinstance(time, self.supported_iterable_types):  #
-            # needed in case of ufloat
-            ut_is_already_set = False
-            uv_is_already_set = False
+            n = len(time)
 
             # time (could be array of float or ufloat)
-            if isinstance(time[0], uncertainties.core.Variable):
-                t = unumpy.nominal_values(time)
-                ut = unumpy.std_devs(time)
-                ut_is_already_set = True
+            if n and isinstance(time[0], _UFloat):
+                t, ut = _nom_std(time)
             else:
                 t = time
-
-            # time uncertainty (could be array of same shape as time, single float or inherited from ufloat time)
-            if not ut_is_already_set:
-                if isinstance(time_unc, self.supported_iterable_types):
-                    ut = time_unc
-                else:
-                    ut = [time_unc] * len(time)
-
-            # value (could be array of same shape as time or single float)
-            if isinstance(val, self.supported_iterable_types):
-                if isinstance(val[0], uncertainties.core.Variable):
-                    v = unumpy.nominal_values(val)
-                    uv = unumpy.std_devs(val)
-                    uv_is_already_set = True
-                else:
-                    v = val
+                # time uncertainty (array of same shape as time or single float)
+                ut = time_unc
+
+            # value (could be array of float or ufloat, or single float)
+            if (
+                isinstance(val, self.supported_iterable_types)
+                and len(val)
+                and isinstance(val[0], _UFloat)
+            ):
+                v, uv = _nom_std(val)
+            elif isinstance(val, _UFloat):
+                v = val.nominal_value
+                uv = val.std_dev
             else:
-                v = [val] * len(time)
+                v = val
+                # value uncertainty (array of same shape as time or single float)
+                uv = val_unc
 
-            # value uncertainty (could be array of same shape as time, single float or inherited from ufloat val)
-            if not uv_is_already_set:
-                if isinstance(val_unc, self.supported_iterable_types):
-                    uv = val_unc
-                else:
-                    uv = [val_unc] * len(time)
+            # shape-check user-supplied iterables only, single floats are
+            # broadcasted when written to the buffer
+            for x in (ut, v, uv):
+                if isinstance(x, self.supported_iterable_types) and len(x) != n:
+                    raise ValueError(
+                        "Lengths of time, time_unc, val or val_unc don't match. "
+                        "Check your inputs."
+                    )
 
-            # append to buffer after shape-check
-            if len(t) == len(ut) == len(v) == len(uv):
-                for datapoint in zip(t, ut, v, uv):
-                    self.buffer.append(datapoint)
-            else:
-                raise ValueError(
-                    "Lengths of time, time_unc, val or val_unc don't match. "
-                    "Check your inputs."
-                )
-
-        elif isinstance(time, float):
-            self.buffer.append((time, time_unc, val, val_unc))
+            self._write_columns((t, ut, v, uv), n)
 
         else:
             raise ValueError("Your provided type for data or time is not supported.")
 
+    def add_block(self, block):
+        """Append a block of datapoints that is already laid out like the buffer.
+
+        Skips all type and shape inference of :meth:`add`, the block is copied into
+        the buffer column by column.
+
+        Parameters
+        ----------
+            block: float-array of shape (N, 4)
+                Rows correspond to (time, time_unc, val, val_unc).
+        """
+        if not (
+            isinstance(block, np.ndarray)
+            and block.ndim == 2
+            and block.shape[1] == 4
+            and block.dtype == np.float64
+        ):
+            raise ValueError("block needs to be a float-array of shape (N, 4).")
+
+        self._write_columns(block.T, len(block))
+
+    def add_from_double_buffer(self, buf, ncols=4):
+        """Append the datapoints stored row-wise in a flat buffer of doubles.
+
+        Meant for streams collected into a growing ``array.array("d")``. The
+        buffer is interpreted without copying via :func:`numpy.frombuffer` and
+        then copied into the buffer in bulk.
+
+        Parameters
+        ----------
+            buf: object supporting the buffer protocol, e.g. array.array("d")
+                Flat sequence of doubles, of length N * ncols.
+
+            ncols: int (default: 4)
+                Number of values per datapoint, interpreted like M in :meth:`add`.
+        """
+        if ncols not in self._data_columns:
+            raise ValueError(
+                "ncols needs to be one of {0}.".format(list(self._data_columns))
+            )
+
+        # frombuffer reinterprets raw bytes, so anything but doubles would be garbage
+        if memoryview(buf).format != "d":
+            raise ValueError("buf needs to contain doubles, e.g. array.array('d').")
+
+        data = np.frombuffer(buf, dtype=np.float64).reshape(-1, ncols)
+        self._write_block(data, self._data_columns[ncols])
+
     def pop(self, n_samples=1):
         """
         Return the next `n_samples` from the left side of the buffer.
@@ -185,12 +520,22 @@ class TimeSeriesBuffer:
         
         Return
         ------
-            Depends on return_type, see :func:`__init__` for details
+            Depends on return_type, see :func:`__init__` for details. If no
+            datapoints are returned, the (empty) arrays are read-only.
         """
 
+        # single sample, skip the block read
+        if n_samples == 1 and self._count:
+            i = self._tail
+            self._count -= 1
+            return self._return_row(i)
+
         # take the next samples from the beginning of buffer
-        n_pop = min(n_samples, len(self.buffer))
-        next_samples = [self.buffer.popleft() for i in range(n_pop)]
+        n_pop = max(0, min(n_samples, self._count))
+        next_samples = self._read_columns(self._tail, n_pop)
+
+        # release the popped rows, the tail follows from head and count
+        self._count -= n_pop
 
         # return as specified
         return self._return_converter(next_samples)
@@ -207,58 +552,101 @@ class TimeSeriesBuffer:
         
         Returns
         -------
-            Depends on return_type, see :func:`__init__` for details
+            Depends on return_type, see :func:`__init__` for details. If no
+            datapoints are returned, the (empty) arrays are read-only.
         """
         # get length of internal buffer
-        n_buffer = len(self.buffer)
+        n_buffer = self._count
+
+        # single sample, skip the block read
+        if n_samples == 1 and n_buffer:
+            return self._return_row((self._head - 1) % self._maxlen)
 
         # return all if n_samples is set -1
         if n_samples == -1:
             n_samples = n_buffer
 
         # take the next samples from the beginning of buffer
-        n_pop = min(n_samples, n_buffer)
-        next_samples = [self.buffer[i] for i in range(n_buffer - n_pop, n_buffer)]
+        n_pop = max(0, min(n_samples, n_buffer))
+        start = (self._head - n_pop) % self._maxlen
+        next_samples = self._read_columns(start, n_pop)
 
         # return as specified
         return self._return_converter(next_samples)
 
-    def _return_converter(self, samples):
+    def _return_row(self, i):
+        """Convert the single row `i` of the storage to the format specified by
+        `return_type`, equivalent to :meth:`_return_converter` for one row."""
+
+        # mirrors the dispatch in _return_converter, keep both in sync
 
-        if self.return_type == "list":
-            return samples
+        rt = self._rt
+        t, ut, v, uv = (column.item(i) for column in self._columns)
+
+        if rt == _RT_LIST:
+            return [(t, ut, v, uv)]
+
+        elif rt == _RT_ARRAY:
+            return np.array([(t, ut, v, uv)])
+
+        elif rt == _RT_ARRAYS:
+            return np.array([t]), np.array([ut]), np.array([v]), np.array([uv])
+
+        elif rt == _RT_UARRAY:
+            result = np.empty((1, 2), dtype=object)
+            result[0, 0] = _UVar(t, ut)
+            result[0, 1] = _UVar(v, uv)
+
+            return result
+
+        elif rt == _RT_UARRAYS:
+            tt = np.empty(1, dtype=object)
+            vv = np.empty(1, dtype=object)
+            tt[0] = _UVar(t, ut)
+            vv[0] = _UVar(v, uv)
+
+            return tt, vv
+
+    def _return_converter(self, columns):
+        """Convert the four float-arrays (time, time_unc, val, val_unc) taken from
+        the storage to the format specified by `return_type`."""
+
+        # the single-row variant _return_row mirrors this dispatch, keep both in sync
+
+        rt = self._rt
+
+        if rt == _RT_LIST:
+            return list(zip(*(c.tolist() for c in columns)))
+
+        # handle empty buffer without allocating any data
+        if len(columns[0]) == 0:
+            if rt == _RT_ARRAY:
+                return self._EMPTY_DATA.view()
+            elif rt == _RT_ARRAYS:
+                return tuple(self._EMPTY_COL.view() for _ in range(4))
+            elif rt == _RT_UARRAY:
+                return self._EMPTY_UDATA.view()
+            elif rt == _RT_UARRAYS:
+                return self._EMPTY_UCOL.view(), self._EMPTY_UCOL.view()
 
         else:
-            # handle empty buffer
-            if len(samples) == 0:
-                data = np.empty((0, 4))
-                t = np.empty((0))
-                ut = np.empty((0))
-                v = np.empty((0))
-                uv = np.empty((0))
-
-            # handle non empty buffer
-            else:
-                data = np.array(samples)
-                t = data[:, 0]
-                ut = data[:, 1]
-                v = data[:, 2]
-                uv = data[:, 3]
+            t, ut, v, uv = columns
 
-            if self.return_type == "array":
-                return data
+            if rt == _RT_ARRAY:
+                return np.column_stack(columns)
 
-            elif self.return_type == "arrays":
+            elif rt == _RT_ARRAYS:
                 return t, ut, v, uv
 
-            elif self.return_type == "uarray":
-                tt = unumpy.uarray(t, ut)
-                vv = unumpy.uarray(v, uv)
+            elif rt == _RT_UARRAY:
+                result = np.empty((len(t), 2), dtype=object)
+                _uarray(t, ut, out=result[:, 0])
+                _uarray(v, uv, out=result[:, 1])
 
-                return np.vstack((tt, vv)).T
+                return result
 
-            elif self.return_type == "uarrays":
-                tt = unumpy.uarray(t, ut)
-                vv = unumpy.uarray(v, uv)
+            elif rt == _RT_UARRAYS:
+                tt = _uarray(t, ut)
+                vv = _uarray(v, uv)
 
                 return tt, vv